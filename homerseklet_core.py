@@ -0,0 +1,305 @@
+import csv
+import functools
+import hashlib
+import io
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import streamlit as st
+
+# A nehéz csomagokat (requests, numpy, pandas, pyarrow) csak az első lekéréskor
+# töltjük be, így az oldal első megjelenítése nem fizeti meg az importálási időt.
+
+# ---------------------------------------------------------
+# KONFIGURÁCIÓ
+# ---------------------------------------------------------
+BASE_INDEX_URL = "https://odp.met.hu/weather/weather_reports/synoptic/hungary/daily/csv/"
+_TZ_BUDAPEST = ZoneInfo("Europe/Budapest")
+# A lezárt napok ZIP-jei ide kerülnek, így a folyamat újraindítása után sem kell újra
+# letölteni őket. Felhasználónkénti könyvtár (nem a közös /tmp), csak a tulajdonos érheti el.
+_DISK_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "homerseklet"
+
+# ---------------------------------------------------------
+# SEGÉDFÜGGVÉNYEK
+# ---------------------------------------------------------
+def local_today():
+    return datetime.now(_TZ_BUDAPEST).date()
+
+@functools.lru_cache(maxsize=64)
+def build_filename_for_date(date_obj):
+    y = date_obj.strftime("%Y%m%d")
+    return f"HABP_1D_{y}.csv.zip"
+
+# Közös HTTP session: a TCP/TLS kapcsolat újrahasznosul a lekérések és a
+# Streamlit újrafuttatások között (cache_resource nélkül minden rerun újat hozna létre)
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "homerseklet/1.0"})
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+def _fetch_zip_bytes(url):
+    # stream=True: a választ egyetlen olvasással vesszük át, a darabok
+    # (r.content) utólagos összefűzése nélkül
+    with get_http_session().get(url, stream=True, timeout=(3.05, 30)) as r:
+        r.raise_for_status()
+        return r.raw.read(decode_content=True)
+
+def _write_disk_cache(path, data):
+    # Írás ideiglenes fájlba, majd atomi átnevezés, így félig kiírt ZIP nem kerülhet a
+    # cache-be. Hiba esetén az ideiglenes fájlt töröljük, a cache pedig egyszerűen elmarad.
+    tmp_name = None
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except OSError:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+def open_csv_from_zipbytes(zip_bytes, expected_csv_name=None):
+    # A CSV-t nem csomagoljuk ki egy bájt-objektumba: a ZIP tagot folyamként nyitjuk meg,
+    # a pufferelt olvasó pedig lehetővé teszi a fájl elejének előzetes megtekintését (peek)
+    z = zipfile.ZipFile(io.BytesIO(zip_bytes))
+    if expected_csv_name and expected_csv_name in z.namelist():
+        return io.BufferedReader(z.open(expected_csv_name), buffer_size=64 * 1024)
+    for name in z.namelist():
+        if name.lower().endswith(".csv"):
+            return io.BufferedReader(z.open(name), buffer_size=64 * 1024)
+    raise FileNotFoundError("A zip-ben nem található CSV fájl.")
+
+def _parse_day(zip_bytes, fname):
+    with open_csv_from_zipbytes(zip_bytes, expected_csv_name=fname.replace(".zip","")) as csv_file:
+        return parse_and_find_extremes(csv_file, dialect_key=fname.rsplit("_", 1)[0])
+
+def _fetch_day(url, persist=False):
+    # Letöltés, kicsomagolás és feldolgozás egy lépésben: a cache-be csak a ZIP
+    # (letöltés gombhoz) és a feldolgozott eredmény kerül, a kicsomagolt CSV nem
+    fname = url.rsplit("/", 1)[-1]
+    path = _DISK_CACHE_DIR / fname
+    if persist:
+        try:
+            zip_bytes = path.read_bytes()
+        except OSError:
+            pass
+        else:
+            try:
+                return zip_bytes, _parse_day(zip_bytes, fname)
+            except Exception:
+                # Sérült vagy nem feldolgozható fájl a cache-ben: töröljük és újra letöltjük
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    zip_bytes = _fetch_zip_bytes(url)
+    result = _parse_day(zip_bytes, fname)
+    # Lemezre csak a sikeresen feldolgozott ZIP kerül (pl. HTML hibaoldal vagy csonka válasz nem)
+    if persist:
+        _write_disk_cache(path, zip_bytes)
+    return zip_bytes, result
+
+# A lezárt (tegnapnál régebbi) napok fájljai nem változnak, ezért lejárat nélkül és
+# lemezen is tárolhatók. A mai és a tegnapi fájl még pótlódhat (a tegnapi az első
+# órákban), ezeket csak egy óráig tartjuk meg.
+@st.cache_data(show_spinner=False, max_entries=64)
+def _load_historical(url):
+    return _fetch_day(url, persist=True)
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=64)
+def _load_today(url):
+    return _fetch_day(url)
+
+def load_day(url, date_obj=None):
+    if date_obj is not None and date_obj < local_today() - timedelta(days=1):
+        return _load_historical(url)
+    return _load_today(url)
+
+# Háttérletöltés a szomszédos napokra: a fenti (megosztott) cache-t melegíti,
+# így a következő lekérés hálózati várakozás nélkül kiszolgálható.
+@st.cache_resource(show_spinner=False)
+def get_prefetch_executor():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="homerseklet-prefetch")
+
+def prefetch_dates(dates):
+    executor = get_prefetch_executor()
+    today = local_today()
+    for date_obj in dates:
+        if date_obj > today:
+            continue
+        url = BASE_INDEX_URL + build_filename_for_date(date_obj)
+        # A hibát (pl. még meg nem jelent fájl) a Future elnyeli, a felhasználót nem érinti
+        executor.submit(load_day, url, date_obj)
+
+def find_column(col_index, candidates):
+    # col_index: kisbetűs oszlopnév -> oszlop pozíció (egyszer felépítve), így jelöltenként O(1) a keresés
+    return next((col_index[c] for c in candidates if c in col_index), None)
+
+# Fájltípusonként (pl. "HABP_1D") egyszer megállapított elválasztó: a további fájloknál
+# már nem futtatjuk a szimatolót. A tizedesjel az adat tulajdonsága, nem a formátumé,
+# ezért azt minden fájl elejéből külön határozzuk meg (egyetlen regex keresés).
+_DIALECT_CACHE = {}
+
+def sniff_dialect(head, dialect_key=None):
+    lines = head.decode("utf-8", errors="replace").splitlines()
+    delimiter = _DIALECT_CACHE.get(dialect_key)
+    if delimiter is None:
+        try:
+            # A fejlécsor nem tartalmaz számokat, így a tizedesvessző nem zavarja meg a szimatolást
+            delimiter = csv.Sniffer().sniff(lines[0], delimiters=";,\t").delimiter
+        except (csv.Error, IndexError):
+            delimiter = ";"
+        if dialect_key is not None:
+            _DIALECT_CACHE[dialect_key] = delimiter
+    body = "\n".join(lines[1:])
+    decimal = "," if delimiter != "," and re.search(r"\d,\d", body) else "."
+    return delimiter, decimal
+
+# Tizedesponttal írt szám (előjellel, opcionális kitevővel); ami nem ilyen, hiányzó érték lesz
+_NUMBER_RE = r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$"
+
+def to_float_array(column):
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    # Szöveges oszlop csak a visszaesési úton érkezik (csupa szóköz mező, nem szám érték,
+    # vagy a fájl elején még nem látott tizedesvessző): levágás, tizedesvessző csere, a nem
+    # szám mező (az üres is) hiányzó érték lesz, majd float64 – mint a pd.to_numeric(errors="coerce")
+    if not pa.types.is_floating(column.type):
+        column = pc.utf8_trim_whitespace(column)
+        column = pc.replace_substring(column, ",", ".")
+        numeric = pc.match_substring_regex(column, _NUMBER_RE)
+        column = pc.if_else(numeric, column, pa.scalar(None, pa.string())).cast(pa.float64())
+    values = column.to_numpy(zero_copy_only=False)
+    # -999: hiányzó érték jelölése; egyetlen maszkolás a numpy tömbön
+    return np.where(values == -999, np.nan, values)
+
+def parse_and_find_extremes(csv_file, dialect_key=None):
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pacsv
+
+    # ---- Fejléc: a szükséges oszlopok helyét egyszer, előre határozzuk meg ----
+    # A fájl elejét csak megnézzük (peek), a teljes folyamot az Arrow CSV olvasó dolgozza fel
+    head = csv_file.peek(4096)
+    delimiter, decimal = sniff_dialect(head, dialect_key)
+    header_line = head.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+    header = [c.strip() for c in next(csv.reader([header_line], delimiter=delimiter), [])]
+
+    # ---- StationNumber és StationName B és C oszlop ----
+    if len(header) < 3:
+        raise ValueError("A CSV-ben nincs elég oszlop (minimum 3 szükséges a B és C oszlophoz).")
+
+    # ---- Min & Max oszlopok (K és M) ----
+    if len(header) <= 12:
+        raise ValueError("A CSV-ben nincs elég oszlop a K és M oszlopokhoz.")
+
+    # ---- Koordináták (ha vannak) ----
+    col_index = {c.lower(): i for i, c in reversed(list(enumerate(header)))}
+    lat_idx = find_column(col_index, ("lat", "latitude"))
+    lon_idx = find_column(col_index, ("lon", "longitude", "long"))
+    has_coords = lat_idx is not None and lon_idx is not None
+
+    min_col = header[10]  # K oszlop
+    max_col = header[12]  # M oszlop
+
+    # Csak a felhasznált oszlopokat olvassuk be (include_columns), a többit az Arrow
+    # tokenizáló már beolvasáskor eldobja. A feldolgozás oszloponként, Arrow és numpy
+    # tömbökön történik; pandas csak a végső térképtáblához kell.
+    num_idx = [10, 12] + ([lat_idx, lon_idx] if has_coords else [])
+    usecols = [1, 2] + num_idx
+
+    def read_table(numeric_type):
+        csv_file.seek(0)
+        return pacsv.read_csv(
+            csv_file,
+            read_options=pacsv.ReadOptions(column_names=header, skip_rows=1, use_threads=True),
+            parse_options=pacsv.ParseOptions(delimiter=delimiter),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=[header[i] for i in usecols],
+                column_types={header[i]: (numeric_type if i in num_idx else pa.string()) for i in usecols},
+                null_values=[""],
+                decimal_point=decimal
+            )
+        )
+
+    try:
+        # Gyors út: a számokat (tizedesjel, kitöltő szóközök, üres mező) már a tokenizáló alakítja át
+        table = read_table(pa.float64())
+    except pa.ArrowInvalid:
+        # Csak szóközökből álló mező a null_values pontos egyezésén kívül esik: szöveges beolvasás
+        table = read_table(pa.string())
+
+    # A kitöltő szóközöket Arrow kernel vágja le (a string oszlopban nincs null,
+    # így az astype(str) és a soronkénti Python .str.strip() elhagyható)
+    station_number = pc.utf8_trim_whitespace(table[header[1]]).to_numpy()  # B oszlop
+    station_name = pc.utf8_trim_whitespace(table[header[2]]).to_numpy()    # C oszlop
+
+    min_arr = to_float_array(table[min_col])
+    max_arr = to_float_array(table[max_col])
+
+    if has_coords:
+        lat_arr = to_float_array(table[header[lat_idx]])
+        lon_arr = to_float_array(table[header[lon_idx]])
+    else:
+        lat_arr = np.full(table.num_rows, np.nan)
+        lon_arr = np.full(table.num_rows, np.nan)
+
+    # ---- Szélsők meghatározása ----
+    # Pozíció szerinti keresés a nyers tömbökön: a hiányzó értékeket +/-végtelenre
+    # cseréljük, így egy sima argmin/argmax elég. Ha a kiválasztott érték is hiányzó,
+    # akkor minden érték hiányzik, vagyis nincs szélsőérték (külön any() menet nélkül).
+    def extreme_at(values, i):
+        return {
+            "value": float(values[i]),
+            # Kombinált név (StationName (StationNumber)) csak a két kiválasztott sorra
+            "station": f"{station_name[i]} ({station_number[i]})",
+            "lat": None if np.isnan(lat_arr[i]) else float(lat_arr[i]),
+            "lon": None if np.isnan(lon_arr[i]) else float(lon_arr[i])
+        }
+
+    def extreme(values, i):
+        return None if np.isnan(values[i]) else extreme_at(values, i)
+
+    min_res = extreme(min_arr, np.where(np.isnan(min_arr), np.inf, min_arr).argmin()) if len(min_arr) else None
+    max_res = extreme(max_arr, np.where(np.isnan(max_arr), -np.inf, max_arr).argmax()) if len(max_arr) else None
+
+    # A térképre csak a koordinátával rendelkező állomások kerülnek; a szűrés itt, a cache-elt
+    # letöltéssel együtt fut le egyszer, nem minden Streamlit újrafuttatáskor
+    located = ~(np.isnan(lat_arr) | np.isnan(lon_arr))
+    df_map = pd.DataFrame({
+        "station_name": station_name[located],
+        "station_number": station_number[located],
+        "lat": lat_arr[located],
+        "lon": lon_arr[located],
+        "min_val": min_arr[located],
+        "max_val": max_arr[located]
+    })
+
+    return min_res, max_res, df_map
+
+def frame_digest(df):
+    # Tartalom szerinti ujjlenyomat (pl. a térkép cache kulcsához)
+    import pandas as pd
+
+    return hashlib.blake2b(pd.util.hash_pandas_object(df).values.tobytes(), digest_size=16).hexdigest()